@@ -1,5 +1,7 @@
-from __future__ import annotations
-import os
+from __future__ import annotations
+import os
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from sqlalchemy import create_engine, text
@@ -15,76 +17,47 @@ ANNOTATION_TYPE_MISSING_AVAILABLE = "missing_excl_available"
 ANNOTATION_TYPE_MISSING_UNAVAILABLE = "missing_excl_unavailable"
 
 
-def missing_exclusion_case(alias: str) -> str:
-    return f"""
-        CASE
-          WHEN {alias}.est_disponible = -1 THEN
-            CASE
-              WHEN EXISTS (
-                SELECT 1 FROM indicator.dispo_annotations m
-                WHERE m.actif = 1
-                  AND m.type_annotation = '{ANNOTATION_TYPE_MISSING_UNAVAILABLE}'
-                  AND m.site = {alias}.site
-                  AND m.equipement_id = {alias}.equipement_id
-                  AND NOT (m.date_fin <= {alias}.date_debut OR m.date_debut >= {alias}.date_fin)
-              ) THEN 2
-              WHEN EXISTS (
-                SELECT 1 FROM indicator.dispo_annotations m
-                WHERE m.actif = 1
-                  AND m.type_annotation = '{ANNOTATION_TYPE_MISSING_AVAILABLE}'
-                  AND m.site = {alias}.site
-                  AND m.equipement_id = {alias}.equipement_id
-                  AND NOT (m.date_fin <= {alias}.date_debut OR m.date_debut >= {alias}.date_fin)
-              ) THEN 1
-              ELSE 0
-            END
-          ELSE 0
-        END
-    """
-
-
 def mysql_engine():
     return create_engine(
         f"mysql+mysqlconnector://{MYSQL_USER}:{MYSQL_PW}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
     )
-
-INSERT_PCT_MOIS = text("""
-INSERT INTO indicator.dispo_pct_mois
-(site, equipement_id, mois, pct_brut, pct_excl, total_minutes, processed_at)
-VALUES (:site, :equip, :mois, :pct_brut, :pct_excl, :total_minutes, UTC_TIMESTAMP())
-ON DUPLICATE KEY UPDATE
-  pct_brut = VALUES(pct_brut),
-  pct_excl = VALUES(pct_excl),
-  total_minutes = VALUES(total_minutes),
-  processed_at = UTC_TIMESTAMP()
-""")
-
+
+INSERT_PCT_MOIS = text("""
+INSERT INTO indicator.dispo_pct_mois
+(site, equipement_id, mois, pct_brut, pct_excl, total_minutes, processed_at)
+VALUES (:site, :equip, :mois, :pct_brut, :pct_excl, :total_minutes, UTC_TIMESTAMP())
+ON DUPLICATE KEY UPDATE
+  pct_brut = VALUES(pct_brut),
+  pct_excl = VALUES(pct_excl),
+  total_minutes = VALUES(total_minutes),
+  processed_at = UTC_TIMESTAMP()
+""")
+
 def calculate_availability(df: pd.DataFrame, include_exclusions: bool = False) -> dict:
     if df.empty:
         return {"total_minutes": 0, "available_minutes": 0, "pct_available": 0.0}
+    est = df["est_disponible"].to_numpy()
+    dur = df["duration_minutes"].to_numpy()
     missing_mode = (
-        df["missing_exclusion_mode"]
+        df["missing_exclusion_mode"].to_numpy()
         if "missing_exclusion_mode" in df.columns
-        else pd.Series(0, index=df.index)
+        else np.zeros_like(est)
     )
-    missing_as_available = (df["est_disponible"] == -1) & (missing_mode == 1)
-    missing_as_unavailable = (df["est_disponible"] == -1) & (missing_mode == 2)
+    missing_as_available = (est == -1) & (missing_mode == 1)
+    missing_as_unavailable = (est == -1) & (missing_mode == 2)
 
-    base_available_mask = (df["est_disponible"] == 1) | missing_as_available
+    base_available_mask = (est == 1) | missing_as_available
 
     if include_exclusions:
-        available_mask = base_available_mask | (
-            (df["est_disponible"] == 0) & (df["is_excluded"] == 1)
-        )
-        unavailable_mask = (
-            ((df["est_disponible"] == 0) & (df["is_excluded"] == 0))
-        ) | missing_as_unavailable
+        is_excluded = df["is_excluded"].to_numpy()
+        available_mask = base_available_mask | ((est == 0) & (is_excluded == 1))
+        unavailable_mask = ((est == 0) & (is_excluded == 0)) | missing_as_unavailable
     else:
         available_mask = base_available_mask
-        unavailable_mask = (df["est_disponible"] == 0) | missing_as_unavailable
+        unavailable_mask = (est == 0) | missing_as_unavailable
 
-    available = int(df.loc[available_mask, "duration_minutes"].sum())
-    unavailable = int(df.loc[unavailable_mask, "duration_minutes"].sum())
+    available = int(dur[available_mask].sum())
+    unavailable = int(dur[unavailable_mask].sum())
     effective_total = available + unavailable
     pct_available = (available / effective_total * 100) if effective_total > 0 else 0.0
     return {
@@ -92,79 +65,235 @@ def calculate_availability(df: pd.DataFrame, include_exclusions: bool = False) -
         "available_minutes": available,
         "pct_available": pct_available,
     }
-
-def update_monthly():
-    eng = mysql_engine()
-    missing_case_ac = missing_exclusion_case("a")
-    missing_case_bt = missing_exclusion_case("b")
-    missing_case_bt2 = missing_exclusion_case("c")
-    query = f"""
-        SELECT site, equipement_id, date_debut, date_fin, est_disponible,
-               TIMESTAMPDIFF(MINUTE, date_debut, date_fin) as duration_minutes,
-               CASE
-                 WHEN est_disponible <> 1 THEN CAST(EXISTS (
-                   SELECT 1 FROM indicator.dispo_annotations a
-                   WHERE a.actif = 1 AND a.type_annotation = '{ANNOTATION_TYPE_EXCLUSION}'
-                     AND a.site = site AND a.equipement_id = equipement_id
-                     AND NOT (a.date_fin <= date_debut OR a.date_debut >= date_fin)
-                 ) AS UNSIGNED)
-                 ELSE 0
-               END AS is_excluded,
-               {missing_case_ac} AS missing_exclusion_mode
-        FROM indicator.dispo_blocs_ac AS a
-        UNION ALL
-        SELECT site, equipement_id, date_debut, date_fin, est_disponible,
-               TIMESTAMPDIFF(MINUTE, date_debut, date_fin) as duration_minutes,
+
+# Index couvrants pour le scan des blocs et la sonde de recouvrement des
+# annotations : sans eux MySQL repart en full scan sur les plus grosses tables.
+INDEX_DEFS = [
+    ("dispo_blocs_ac", "ix_blocs_ac_scan", "(site, equipement_id, date_debut, date_fin, est_disponible)"),
+    ("dispo_blocs_batt", "ix_blocs_batt_scan", "(site, equipement_id, date_debut, date_fin, est_disponible)"),
+    ("dispo_blocs_batt2", "ix_blocs_batt2_scan", "(site, equipement_id, date_debut, date_fin, est_disponible)"),
+    ("dispo_annotations", "ix_annotations_probe", "(actif, type_annotation, site, equipement_id, date_debut, date_fin)"),
+]
+
+
+def ensure_indexes(eng) -> None:
+    """Crée les index composites s'ils n'existent pas encore (idempotent)."""
+    check = text("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = :db AND table_name = :table AND index_name = :index
+    """)
+    for table, index, columns in INDEX_DEFS:
+        try:
+            with eng.begin() as conn:
+                exists = conn.execute(
+                    check, {"db": MYSQL_DB, "table": table, "index": index}
+                ).scalar()
+                if not exists:
+                    conn.execute(text(f"CREATE INDEX {index} ON indicator.{table} {columns}"))
+        except Exception as exc:
+            print(f"⚠️ Impossible de créer l'index {index} sur {table} ({exc})")
+
+
+def _bloc_branch_sql(table: str, alias: str) -> str:
+    """Branche SELECT d'une table de blocs avec flags d'annotation par jointure.
+
+    Un seul LEFT JOIN sur dispo_annotations remplace les sous-requêtes
+    EXISTS corrélées ; les flags sont repliés par MAX() après GROUP BY
+    sur les colonnes du bloc.
+    """
+    return f"""
+        SELECT {alias}.site, {alias}.equipement_id, {alias}.date_debut, {alias}.date_fin,
+               {alias}.est_disponible,
+               TIMESTAMPDIFF(MINUTE, {alias}.date_debut, {alias}.date_fin) AS duration_minutes,
                CASE
-                 WHEN est_disponible <> 1 THEN CAST(EXISTS (
-                   SELECT 1 FROM indicator.dispo_annotations a
-                   WHERE a.actif = 1 AND a.type_annotation = '{ANNOTATION_TYPE_EXCLUSION}'
-                     AND a.site = site AND a.equipement_id = equipement_id
-                     AND NOT (a.date_fin <= date_debut OR a.date_debut >= date_fin)
-                 ) AS UNSIGNED)
+                 WHEN {alias}.est_disponible <> 1
+                 THEN MAX(COALESCE(ann.type_annotation = '{ANNOTATION_TYPE_EXCLUSION}', 0))
                  ELSE 0
                END AS is_excluded,
-               {missing_case_bt} AS missing_exclusion_mode
-        FROM indicator.dispo_blocs_batt AS b
-        UNION ALL
-        SELECT site, equipement_id, date_debut, date_fin, est_disponible,
-               TIMESTAMPDIFF(MINUTE, date_debut, date_fin) as duration_minutes,
                CASE
-                 WHEN est_disponible <> 1 THEN CAST(EXISTS (
-                   SELECT 1 FROM indicator.dispo_annotations a
-                   WHERE a.actif = 1 AND a.type_annotation = '{ANNOTATION_TYPE_EXCLUSION}'
-                     AND a.site = site AND a.equipement_id = equipement_id
-                     AND NOT (a.date_fin <= date_debut OR a.date_debut >= date_fin)
-                 ) AS UNSIGNED)
+                 WHEN {alias}.est_disponible = -1 THEN
+                   CASE
+                     WHEN MAX(COALESCE(ann.type_annotation = '{ANNOTATION_TYPE_MISSING_UNAVAILABLE}', 0)) = 1 THEN 2
+                     WHEN MAX(COALESCE(ann.type_annotation = '{ANNOTATION_TYPE_MISSING_AVAILABLE}', 0)) = 1 THEN 1
+                     ELSE 0
+                   END
                  ELSE 0
-               END AS is_excluded,
-               {missing_case_bt2} AS missing_exclusion_mode
-        FROM indicator.dispo_blocs_batt2 AS c
+               END AS missing_exclusion_mode
+        FROM {table} AS {alias}
+        LEFT JOIN indicator.dispo_annotations ann
+          ON ann.actif = 1
+         AND ann.type_annotation IN (
+               '{ANNOTATION_TYPE_EXCLUSION}',
+               '{ANNOTATION_TYPE_MISSING_AVAILABLE}',
+               '{ANNOTATION_TYPE_MISSING_UNAVAILABLE}'
+             )
+         AND ann.site = {alias}.site
+         AND ann.equipement_id = {alias}.equipement_id
+         AND NOT (ann.date_fin <= {alias}.date_debut OR ann.date_debut >= {alias}.date_fin)
+        GROUP BY {alias}.site, {alias}.equipement_id, {alias}.date_debut, {alias}.date_fin,
+                 {alias}.est_disponible
+    """
+
+
+@lru_cache(maxsize=None)
+def _blocks_union_sql() -> str:
+    return " UNION ALL ".join([
+        _bloc_branch_sql("indicator.dispo_blocs_ac", "a"),
+        _bloc_branch_sql("indicator.dispo_blocs_batt", "b"),
+        _bloc_branch_sql("indicator.dispo_blocs_batt2", "c"),
+    ])
+
+
+AVAILABLE_RAW_CASE = "(est_disponible = 1 OR (est_disponible = -1 AND missing_exclusion_mode = 1))"
+UNAVAILABLE_RAW_CASE = "(est_disponible = 0 OR (est_disponible = -1 AND missing_exclusion_mode = 2))"
+AVAILABLE_EXCL_CASE = (
+    "(est_disponible = 1 OR (est_disponible = -1 AND missing_exclusion_mode = 1)"
+    " OR (est_disponible = 0 AND is_excluded = 1))"
+)
+UNAVAILABLE_EXCL_CASE = (
+    "((est_disponible = 0 AND is_excluded = 0)"
+    " OR (est_disponible = -1 AND missing_exclusion_mode = 2))"
+)
+
+
+# Construit une seule fois à l'import : la requête est statique et
+# SQLAlchemy réutilise le même objet text() compilé à chaque refresh.
+UPSERT_PCT_MOIS_SQL = text(f"""
+    INSERT INTO indicator.dispo_pct_mois
+    (site, equipement_id, mois, pct_brut, pct_excl, total_minutes, processed_at)
+    SELECT
+      site,
+      equipement_id,
+      DATE(DATE_FORMAT(date_debut, '%Y-%m-01')) AS mois,
+      COALESCE(
+        SUM(CASE WHEN {AVAILABLE_RAW_CASE} THEN duration_minutes ELSE 0 END)
+        / NULLIF(
+            SUM(CASE WHEN {AVAILABLE_RAW_CASE} OR {UNAVAILABLE_RAW_CASE} THEN duration_minutes ELSE 0 END),
+            0
+          ) * 100,
+        0
+      ) AS pct_brut,
+      COALESCE(
+        SUM(CASE WHEN {AVAILABLE_EXCL_CASE} THEN duration_minutes ELSE 0 END)
+        / NULLIF(
+            SUM(CASE WHEN {AVAILABLE_EXCL_CASE} OR {UNAVAILABLE_EXCL_CASE} THEN duration_minutes ELSE 0 END),
+            0
+          ) * 100,
+        0
+      ) AS pct_excl,
+      SUM(CASE WHEN {AVAILABLE_RAW_CASE} OR {UNAVAILABLE_RAW_CASE} THEN duration_minutes ELSE 0 END)
+        AS total_minutes,
+      UTC_TIMESTAMP()
+    FROM ({_blocks_union_sql()}) blocs
+    GROUP BY site, equipement_id, mois
+    ON DUPLICATE KEY UPDATE
+      pct_brut = VALUES(pct_brut),
+      pct_excl = VALUES(pct_excl),
+      total_minutes = VALUES(total_minutes),
+      processed_at = UTC_TIMESTAMP()
+""")
+
+
+def _update_monthly_sql(eng) -> None:
+    """Calcule et upserte dispo_pct_mois entièrement côté MySQL.
+
+    Reproduit la logique de calculate_availability via des SUM(CASE ...)
+    agrégés par (site, equipement_id, mois) : aucune donnée ne transite
+    vers Python et un seul aller-retour réseau est nécessaire.
     """
-    df = pd.read_sql(query, eng)
-
-    if df.empty:
-        print("⚠️ Pas de données disponibles")
-        return
-
-    df["date_debut"] = pd.to_datetime(df["date_debut"], utc=True)
-    df["month"] = df["date_debut"].dt.to_period("M").dt.to_timestamp()
-
-    with eng.begin() as conn:
-        for (site, equip), group_site in df.groupby(["site", "equipement_id"]):
-            for month, group in group_site.groupby("month"):
-                stats_raw = calculate_availability(group, include_exclusions=False)
-                stats_excl = calculate_availability(group, include_exclusions=True)
-
-                conn.execute(INSERT_PCT_MOIS, {
-                    "site": site,
-                    "equip": equip,
-                    "mois": month.to_pydatetime().date(),
-                    "pct_brut": stats_raw["pct_available"],
-                    "pct_excl": stats_excl["pct_available"],
-                    "total_minutes": stats_raw["total_minutes"],
-                })
-    print("✅ Table dispo_pct_mois mise à jour avec succès !")
-
-if __name__ == "__main__":
-    update_monthly()
+    with eng.begin() as conn:
+        conn.execute(UPSERT_PCT_MOIS_SQL)
+
+
+CHUNK_SIZE = 50_000
+
+
+def _update_monthly_python(eng) -> bool:
+    """Chemin de repli : agrégation pandas côté client puis upserts.
+
+    Le résultat du UNION ALL est parcouru en flux (curseur serveur) par
+    tranches de CHUNK_SIZE lignes : la mémoire reste bornée par la taille
+    d'une tranche et les minutes sont accumulées par (site, equip, mois).
+    """
+    totals: dict = {}
+    with eng.connect().execution_options(
+        stream_results=True, max_row_buffer=CHUNK_SIZE
+    ) as conn:
+        for chunk in pd.read_sql(_blocks_union_sql(), conn, chunksize=CHUNK_SIZE):
+            if chunk.empty:
+                continue
+            chunk["date_debut"] = pd.to_datetime(chunk["date_debut"], utc=True)
+            chunk["month"] = chunk["date_debut"].dt.to_period("M").dt.to_timestamp()
+
+            # Classification brut/exclusions en colonnes entières : un seul
+            # groupby.sum remplace les deux passes de calculate_availability
+            # par groupe.
+            est = chunk["est_disponible"].to_numpy()
+            dur = chunk["duration_minutes"].to_numpy()
+            mm = (
+                chunk["missing_exclusion_mode"].to_numpy()
+                if "missing_exclusion_mode" in chunk.columns
+                else np.zeros_like(est)
+            )
+            ie = (
+                chunk["is_excluded"].to_numpy()
+                if "is_excluded" in chunk.columns
+                else np.zeros_like(est)
+            )
+            base_avail = (est == 1) | ((est == -1) & (mm == 1))
+            missing_unavail = (est == -1) & (mm == 2)
+            chunk["avail_raw"] = np.where(base_avail, dur, 0)
+            chunk["unavail_raw"] = np.where((est == 0) | missing_unavail, dur, 0)
+            chunk["avail_excl"] = np.where(base_avail | ((est == 0) & (ie == 1)), dur, 0)
+            chunk["unavail_excl"] = np.where(((est == 0) & (ie == 0)) | missing_unavail, dur, 0)
+
+            agg = chunk.groupby(["site", "equipement_id", "month"])[
+                ["avail_raw", "unavail_raw", "avail_excl", "unavail_excl"]
+            ].sum()
+            for row in agg.itertuples():
+                acc = totals.setdefault(
+                    row.Index,
+                    {"avail_raw": 0, "total_raw": 0, "avail_excl": 0, "total_excl": 0},
+                )
+                acc["avail_raw"] += int(row.avail_raw)
+                acc["total_raw"] += int(row.avail_raw + row.unavail_raw)
+                acc["avail_excl"] += int(row.avail_excl)
+                acc["total_excl"] += int(row.avail_excl + row.unavail_excl)
+
+    if not totals:
+        print("⚠️ Pas de données disponibles")
+        return False
+
+    params = []
+    for (site, equip, month), acc in totals.items():
+        pct_brut = (acc["avail_raw"] / acc["total_raw"] * 100) if acc["total_raw"] > 0 else 0.0
+        pct_excl = (acc["avail_excl"] / acc["total_excl"] * 100) if acc["total_excl"] > 0 else 0.0
+        params.append({
+            "site": site,
+            "equip": equip,
+            "mois": month.to_pydatetime().date(),
+            "pct_brut": pct_brut,
+            "pct_excl": pct_excl,
+            "total_minutes": acc["total_raw"],
+        })
+
+    with eng.begin() as conn:
+        # Un seul execute() avec la liste complète : SQLAlchemy passe par
+        # executemany côté driver au lieu d'un aller-retour par mois.
+        conn.execute(INSERT_PCT_MOIS, params)
+    return True
+
+
+def update_monthly():
+    eng = mysql_engine()
+    ensure_indexes(eng)
+    try:
+        _update_monthly_sql(eng)
+    except Exception as exc:
+        print(f"⚠️ Agrégation SQL impossible ({exc}), repli sur le calcul Python")
+        if not _update_monthly_python(eng):
+            return
+    print("✅ Table dispo_pct_mois mise à jour avec succès !")
+
+if __name__ == "__main__":
+    update_monthly()
@@ -1,53 +1,118 @@
 """Contract availability computation utilities."""
 from __future__ import annotations
 
-from collections import defaultdict
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Callable, Dict, List, Optional, Sequence, Tuple
-from bisect import bisect_right
 
+import numpy as np
 import pandas as pd
 
 
 @dataclass
 class AvailabilityTimeline:
-    """Represents availability states on a time range."""
+    """Represents availability states on a time range.
+
+    Intervals are stored column-wise as parallel NumPy arrays (epoch
+    nanoseconds for the bounds, int8 for the states) so lookups are a
+    searchsorted plus array indexing, and whole timestamp batches can be
+    evaluated at once with :meth:`status_at_many`.
+    """
 
     intervals: Sequence[Tuple[pd.Timestamp, pd.Timestamp, int, int]]
 
     def __post_init__(self) -> None:
-        self._starts = [start for start, *_ in self.intervals]
+        count = len(self.intervals)
+        self._starts_ns = np.fromiter(
+            (item[0].value for item in self.intervals), dtype=np.int64, count=count
+        )
+        self._ends_ns = np.fromiter(
+            (item[1].value for item in self.intervals), dtype=np.int64, count=count
+        )
+        self._available = np.fromiter(
+            (item[2] for item in self.intervals), dtype=np.int8, count=count
+        )
+        self._excluded = np.fromiter(
+            (item[3] for item in self.intervals), dtype=np.int8, count=count
+        )
 
     def status_at(self, ts: pd.Timestamp) -> Tuple[bool, bool, bool]:
         """Return (is_available, is_excluded, has_data) for a timestamp."""
-        if not self.intervals:
+        if not self._starts_ns.size:
             return False, False, False
 
-        idx = bisect_right(self._starts, ts) - 1
+        ts_ns = ts.value
+        idx = int(np.searchsorted(self._starts_ns, ts_ns, side="right")) - 1
         if idx < 0:
             return False, False, False
 
-        start, end, available, is_excluded = self.intervals[idx]
-        if start <= ts < end:
+        if ts_ns < self._ends_ns[idx]:
+            available = int(self._available[idx])
+            is_excluded = bool(self._excluded[idx] == 1)
             if available == -1:
-                return False, is_excluded == 1, False
-            return available == 1, is_excluded == 1, True
+                return False, is_excluded, False
+            return available == 1, is_excluded, True
         return False, False, False
 
+    def status_at_many(
+        self, ts_ns: "np.ndarray"
+    ) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """Batch version of :meth:`status_at` over an int64 nanosecond array.
+
+        Returns boolean arrays (is_available, is_excluded, has_data).
+        """
+        if not self._starts_ns.size:
+            empty = np.zeros(ts_ns.shape, dtype=bool)
+            return empty, empty.copy(), empty.copy()
+
+        idx = np.searchsorted(self._starts_ns, ts_ns, side="right") - 1
+        idx_clipped = np.clip(idx, 0, None)
+        valid = (idx >= 0) & (ts_ns < self._ends_ns[idx_clipped])
+        available = valid & (self._available[idx_clipped] == 1)
+        excluded = valid & (self._excluded[idx_clipped] == 1)
+        has_data = valid & (self._available[idx_clipped] != -1)
+        return available, excluded, has_data
+
     def has_data(self) -> bool:
-        return bool(self.intervals)
+        return bool(self._starts_ns.size)
 
 
 @dataclass
 class IntervalCollection:
     intervals: Sequence[Tuple[pd.Timestamp, pd.Timestamp]]
 
+    def __post_init__(self) -> None:
+        merged: List[Tuple[int, int]] = []
+        for start_ns, end_ns in sorted((s.value, e.value) for s, e in self.intervals):
+            if merged and start_ns <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end_ns))
+            else:
+                merged.append((start_ns, end_ns))
+        self._starts_ns = np.fromiter((s for s, _ in merged), dtype=np.int64, count=len(merged))
+        self._ends_ns = np.fromiter((e for _, e in merged), dtype=np.int64, count=len(merged))
+
     def covers(self, start: pd.Timestamp, end: pd.Timestamp) -> bool:
-        for interval_start, interval_end in self.intervals:
-            if interval_start <= start and interval_end >= end:
-                return True
-        return False
+        if not self._starts_ns.size:
+            return False
+        idx = int(np.searchsorted(self._starts_ns, start.value, side="right")) - 1
+        return idx >= 0 and bool(self._ends_ns[idx] >= end.value)
+
+    def covers_many(self, start_ns: "np.ndarray", end_ns: "np.ndarray") -> "np.ndarray":
+        """Boolean array marking the (start, end) pairs fully covered."""
+        if not self._starts_ns.size:
+            return np.zeros(start_ns.shape, dtype=bool)
+        idx = np.searchsorted(self._starts_ns, start_ns, side="right") - 1
+        idx_clipped = np.clip(idx, 0, None)
+        return (idx >= 0) & (self._ends_ns[idx_clipped] >= end_ns)
+
+
+# Sentinelle partagée pour les équipements sans timeline chargée.
+_EMPTY_TIMELINE = AvailabilityTimeline([])
+
+
+def _availability_at(timeline: AvailabilityTimeline, ts_ns: "np.ndarray") -> "np.ndarray":
+    """Boolean "available and has data" view of ``status_at_many``."""
+    return timeline.status_at_many(ts_ns)[0]
 
 
 EquipmentTimelineLoader = Callable[[str, datetime, datetime], Dict[str, AvailabilityTimeline]]
@@ -62,6 +127,16 @@ def localize_to_paris(dt: datetime) -> pd.Timestamp:
     return ts.tz_convert("Europe/Paris")
 
 
+def localize_series_to_paris(series: pd.Series) -> pd.Series:
+    """Column-level counterpart of :func:`localize_to_paris`."""
+    converted = pd.to_datetime(series, errors="coerce")
+    if converted.dt.tz is None:
+        return converted.dt.tz_localize(
+            "Europe/Paris", nonexistent="shift_forward", ambiguous="NaT"
+        )
+    return converted.dt.tz_convert("Europe/Paris")
+
+
 def build_timeline(
     df: Optional[pd.DataFrame],
     start: pd.Timestamp,
@@ -69,41 +144,50 @@ def build_timeline(
 ) -> AvailabilityTimeline:
     if df is None or df.empty:
         return AvailabilityTimeline([])
+    if "date_debut" not in df.columns or "date_fin" not in df.columns:
+        return AvailabilityTimeline([])
 
-    records: List[Tuple[pd.Timestamp, pd.Timestamp, int, int]] = []
-    for _, row in df.iterrows():
-        start_ts = pd.to_datetime(row.get("date_debut"))
-        end_ts = pd.to_datetime(row.get("date_fin"))
-        if pd.isna(start_ts) or pd.isna(end_ts):
-            continue
-        if start_ts.tzinfo is None:
-            start_ts = start_ts.tz_localize("Europe/Paris", nonexistent="shift_forward", ambiguous="NaT")
-        else:
-            start_ts = start_ts.tz_convert("Europe/Paris")
-        if end_ts.tzinfo is None:
-            end_ts = end_ts.tz_localize("Europe/Paris", nonexistent="shift_forward", ambiguous="NaT")
-        else:
-            end_ts = end_ts.tz_convert("Europe/Paris")
-        start_clipped = max(start_ts, start)
-        end_clipped = min(end_ts, end)
-        if pd.isna(start_clipped) or pd.isna(end_clipped) or start_clipped >= end_clipped:
-            continue
-        est = int(row.get("est_disponible", 0))
-        missing_mode = int(row.get("missing_exclusion_mode", 0))
-        available = est
-        is_excluded = int(row.get("is_excluded", 0))
-        if est == -1:
-            if missing_mode == 1:
-                available = 1
-                is_excluded = 1
-            elif missing_mode == 2:
-                available = 0
-                is_excluded = 1
-            else:
-                available = -1
-        records.append((start_clipped, end_clipped, available, is_excluded))
+    starts = localize_series_to_paris(df["date_debut"])
+    ends = localize_series_to_paris(df["date_fin"])
+
+    starts = starts.clip(lower=start)
+    ends = ends.clip(upper=end)
+    mask = starts.notna() & ends.notna() & (starts < ends)
+    if not mask.any():
+        return AvailabilityTimeline([])
 
-    records.sort(key=lambda item: item[0])
+    def _int_column(name: str) -> pd.Series:
+        if name in df.columns:
+            return pd.to_numeric(df[name], errors="coerce").fillna(0).astype(int)
+        return pd.Series(0, index=df.index)
+
+    est = _int_column("est_disponible")
+    missing_mode = _int_column("missing_exclusion_mode")
+    available = est.copy()
+    is_excluded = _int_column("is_excluded")
+
+    missing = est == -1
+    available[missing & (missing_mode == 1)] = 1
+    available[missing & (missing_mode == 2)] = 0
+    is_excluded[missing & (missing_mode != 0)] = 1
+
+    order = np.argsort(starts[mask].values, kind="stable")
+    start_list = starts[mask].tolist()
+    end_list = ends[mask].tolist()
+    avail_list = available[mask].tolist()
+    excl_list = is_excluded[mask].tolist()
+    # Fusionne les blocs contigus de même état : les séries de blocs
+    # consécutifs identiques sont fréquentes et gonflent inutilement les
+    # tableaux de recherche de la timeline.
+    records: List[Tuple[pd.Timestamp, pd.Timestamp, int, int]] = []
+    for i in order:
+        record = (start_list[i], end_list[i], avail_list[i], excl_list[i])
+        if records:
+            last = records[-1]
+            if record[0] == last[1] and record[2] == last[2] and record[3] == last[3]:
+                records[-1] = (last[0], record[1], last[2], last[3])
+                continue
+        records.append(record)
     return AvailabilityTimeline(records)
 
 
@@ -145,100 +229,111 @@ class ContractCalculator:
             warnings.append("Données manquantes pour : " + ", ".join(missing))
 
         step_duration = pd.Timedelta(minutes=10)
-        cursor = start
+        n_steps = int((end - start) // step_duration)
 
-        aggregates: Dict[pd.Timestamp, Dict[str, float]] = defaultdict(
-            lambda: {"T2": 0, "T3": 0, "T_sum": 0.0}
-        )
-
-        def minute_checkpoints(step_start: pd.Timestamp) -> List[pd.Timestamp]:
-            return [step_start + timedelta(minutes=i, seconds=30) for i in range(10)]
-
-        while cursor + step_duration <= end:
-            step_start = cursor
-            step_end = cursor + step_duration
-            month_key = step_start.to_period("M").to_timestamp()
-            aggregates[month_key]["T2"] += 1
-
-            if exclusion_intervals.covers(step_start, step_end):
-                aggregates[month_key]["T3"] += 1
-                cursor = step_end
-                continue
-
-            checkpoints = minute_checkpoints(step_start)
-
-            ac_timeline = equipment_timelines.get("AC", AvailabilityTimeline([]))
-            ac_ok = True
-            for ts in checkpoints:
-                available, _, has_data = ac_timeline.status_at(ts)
-                if not has_data or not available:
-                    ac_ok = False
-                    break
-            if not ac_ok:
-                cursor = step_end
-                continue
-
-            dc1_timeline = equipment_timelines.get("DC1", AvailabilityTimeline([]))
-            dc2_timeline = equipment_timelines.get("DC2", AvailabilityTimeline([]))
-            batteries_ok = True
-            for ts in checkpoints:
-                dc1_available, _, dc1_has_data = dc1_timeline.status_at(ts)
-                dc2_available, _, dc2_has_data = dc2_timeline.status_at(ts)
-                unavailable_count = int(not dc1_available or not dc1_has_data) + int(
-                    not dc2_available or not dc2_has_data
-                )
-                if unavailable_count >= 2:
-                    batteries_ok = False
-                    break
-            if not batteries_ok:
-                cursor = step_end
-                continue
+        rows: List[Dict[str, float]] = []
+        if n_steps > 0:
+            step_ns = int(step_duration.value)
+            step_start_ns = start.value + np.arange(n_steps, dtype=np.int64) * step_ns
+            step_end_ns = step_start_ns + step_ns
+            # One checkpoint per minute of each step, sampled at +30 s.
+            offsets_ns = (np.arange(10, dtype=np.int64) * 60 + 30) * 1_000_000_000
+            checkpoint_ns = (step_start_ns[:, None] + offsets_ns[None, :]).ravel()
+
+            excluded_steps = exclusion_intervals.covers_many(step_start_ns, step_end_ns)
+
+            ac_ok = _availability_at(
+                equipment_timelines.get("AC", _EMPTY_TIMELINE), checkpoint_ns
+            ).reshape(n_steps, 10)
+            ac_ok_steps = ac_ok.all(axis=1)
+
+            dc1_ok = _availability_at(
+                equipment_timelines.get("DC1", _EMPTY_TIMELINE), checkpoint_ns
+            ).reshape(n_steps, 10)
+            dc2_ok = _availability_at(
+                equipment_timelines.get("DC2", _EMPTY_TIMELINE), checkpoint_ns
+            ).reshape(n_steps, 10)
+            unavailable_batteries = (~dc1_ok).astype(np.int8) + (~dc2_ok).astype(np.int8)
+            batteries_ok_steps = (unavailable_batteries < 2).all(axis=1)
 
             total_pdc = max(len(pdc_timelines), 6)
-            if total_pdc == 0:
-                cursor = step_end
-                continue
-
-            minute_ratios: List[float] = []
-            station_blocked = False
-            for ts in checkpoints:
-                available_pdc = 0
+            # Les masques bon marché (exclusions, AC, batteries) filtrent
+            # d'abord : les timelines PDC ne sont évaluées que sur les
+            # checkpoints des pas encore candidats.
+            candidate_steps = ~excluded_steps & ac_ok_steps & batteries_ok_steps
+            step_values = np.zeros(n_steps, dtype=np.float64)
+            pass_mask = np.zeros(n_steps, dtype=bool)
+            if candidate_steps.any():
+                candidate_idx = np.nonzero(candidate_steps)[0]
+                candidate_ns = (
+                    step_start_ns[candidate_idx][:, None] + offsets_ns[None, :]
+                ).ravel()
+
+                # Des points de charge d'un même site partagent souvent des
+                # timelines identiques : on n'évalue chaque timeline unique
+                # qu'une fois et on pondère par son nombre d'occurrences.
+                unique_timelines: Dict[Tuple[bytes, bytes, bytes], List] = {}
                 for timeline in pdc_timelines:
-                    available, _, has_data = timeline.status_at(ts)
-                    if available and has_data:
-                        available_pdc += 1
-                unavailable_simultaneous = total_pdc - available_pdc
-                if unavailable_simultaneous >= 3:
-                    station_blocked = True
-                    break
-                minute_ratios.append(available_pdc / total_pdc)
-
-            if station_blocked or not minute_ratios:
-                cursor = step_end
-                continue
-
-            step_value = sum(minute_ratios) / len(minute_ratios)
-            aggregates[month_key]["T_sum"] += step_value
-
-            cursor = step_end
-
-        rows: List[Dict[str, float]] = []
-        for month, values in sorted(aggregates.items()):
-            t2 = values["T2"]
-            if t2 == 0:
-                continue
-            t3 = values["T3"]
-            tsum = values["T_sum"]
-            availability_pct = ((tsum + t3) / t2) * 100 if t2 else 0.0
-            rows.append(
-                {
-                    "Mois": month.strftime("%Y-%m"),
-                    "T2": int(t2),
-                    "T3": int(t3),
-                    "T(11..16)": round(tsum, 2),
-                    "Disponibilité (%)": round(availability_pct, 2),
-                }
+                    key = (
+                        timeline._starts_ns.tobytes(),
+                        timeline._ends_ns.tobytes(),
+                        timeline._available.tobytes(),
+                    )
+                    entry = unique_timelines.get(key)
+                    if entry is None:
+                        unique_timelines[key] = [timeline, 1]
+                    else:
+                        entry[1] += 1
+
+                available_pdc = np.zeros((len(candidate_idx), 10), dtype=np.int32)
+                for timeline, count in unique_timelines.values():
+                    ok = _availability_at(timeline, candidate_ns).reshape(len(candidate_idx), 10)
+                    available_pdc += ok.astype(np.int32) * count if count > 1 else ok
+                station_blocked = ((total_pdc - available_pdc) >= 3).any(axis=1)
+                step_values[candidate_idx] = available_pdc.mean(axis=1) / total_pdc
+                pass_mask[candidate_idx[~station_blocked]] = True
+
+            month_starts = pd.date_range(
+                start=start.tz_localize(None).to_period("M").to_timestamp(),
+                end=end.tz_localize(None),
+                freq="MS",
+            )
+            # as_unit garantit des nanosecondes : les index issus de
+            # to_period().to_timestamp() peuvent être en microsecondes.
+            boundaries_ns = (
+                month_starts.tz_localize(
+                    "Europe/Paris", nonexistent="shift_forward", ambiguous="NaT"
+                )
+                .as_unit("ns")
+                .asi8
             )
+            month_idx = np.searchsorted(boundaries_ns, step_start_ns, side="right") - 1
+            n_months = len(month_starts)
+            t2_by_month = np.bincount(month_idx, minlength=n_months)
+            t3_by_month = np.bincount(
+                month_idx, weights=excluded_steps.astype(np.float64), minlength=n_months
+            )
+            tsum_by_month = np.bincount(
+                month_idx[pass_mask], weights=step_values[pass_mask], minlength=n_months
+            )
+            # month_starts est déjà trié : les lignes sortent directement des
+            # compteurs par mois, sans dictionnaire intermédiaire.
+            for i, month in enumerate(month_starts):
+                t2 = int(t2_by_month[i])
+                if t2 == 0:
+                    continue
+                t3 = int(t3_by_month[i])
+                tsum = float(tsum_by_month[i])
+                availability_pct = ((tsum + t3) / t2) * 100
+                rows.append(
+                    {
+                        "Mois": month.strftime("%Y-%m"),
+                        "T2": t2,
+                        "T3": t3,
+                        "T(11..16)": round(tsum, 2),
+                        "Disponibilité (%)": round(availability_pct, 2),
+                    }
+                )
 
         result = pd.DataFrame(rows)
         if not result.empty:
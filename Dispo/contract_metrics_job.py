@@ -17,6 +17,7 @@ from contract_calculator import (
     ContractCalculator,
     IntervalCollection,
     build_timeline,
+    localize_series_to_paris,
     localize_to_paris,
 )
 
@@ -455,25 +456,15 @@ def _load_exclusion_intervals(
     except SQLAlchemyError:
         return IntervalCollection([])
 
-    intervals: List[Tuple[pd.Timestamp, pd.Timestamp]] = []
-    for _, row in df.iterrows():
-        start_ts = pd.to_datetime(row.get("date_debut"))
-        end_ts = pd.to_datetime(row.get("date_fin"))
-        if pd.isna(start_ts) or pd.isna(end_ts):
-            continue
-        if start_ts.tzinfo is None:
-            start_ts = start_ts.tz_localize("Europe/Paris", nonexistent="shift_forward", ambiguous="NaT")
-        else:
-            start_ts = start_ts.tz_convert("Europe/Paris")
-        if end_ts.tzinfo is None:
-            end_ts = end_ts.tz_localize("Europe/Paris", nonexistent="shift_forward", ambiguous="NaT")
-        else:
-            end_ts = end_ts.tz_convert("Europe/Paris")
-        if pd.isna(start_ts) or pd.isna(end_ts) or start_ts >= end_ts:
-            continue
-        intervals.append((start_ts, end_ts))
+    if df.empty:
+        return IntervalCollection([])
 
-    intervals.sort(key=lambda tpl: tpl[0])
+    starts = localize_series_to_paris(df["date_debut"])
+    ends = localize_series_to_paris(df["date_fin"])
+    mask = starts.notna() & ends.notna() & (starts < ends)
+    intervals: List[Tuple[pd.Timestamp, pd.Timestamp]] = sorted(
+        zip(starts[mask], ends[mask]), key=lambda tpl: tpl[0]
+    )
     return IntervalCollection(intervals)
 
 
@@ -3,14 +3,17 @@
 from __future__ import annotations
 
 import base64
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
-from html import escape
-from io import BytesIO
+from functools import lru_cache
+from itertools import cycle, islice
 from typing import Any, Dict, Iterable, List
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import plotly.io as pio
 
 
@@ -24,6 +27,145 @@ except Exception as exc:  # pragma: no cover - fallback for missing library
 
 MetricDict = Dict[str, Any]
 
+# Feuille vide passée à write_pdf : parsée une fois à l'import plutôt qu'à
+# chaque génération.
+_EMPTY_CSS = CSS(string="")
+
+
+_kaleido_warmed = False
+
+
+def _warm_kaleido() -> None:
+    """Paie le démarrage Chromium de Kaleido une seule fois.
+
+    Le scope Kaleido persiste entre les appels, mais le premier rendu coûte
+    une à deux secondes ; le déclencher avant de paralléliser évite que
+    chaque worker paie son propre démarrage à froid.
+    """
+
+    global _kaleido_warmed
+    if _kaleido_warmed:
+        return
+    try:
+        pio.to_image(go.Figure(layout=dict(width=10, height=10)), format="svg")
+    except (ValueError, RuntimeError):
+        # kaleido absent (RuntimeError depuis plotly 7, ValueError avant) :
+        # le message d'installation sera levé au vrai rendu.
+        pass
+    _kaleido_warmed = True
+
+
+def _render_chart(fig: Any) -> tuple:
+    """Rend une figure en SVG (vectoriel, léger) avec repli PNG."""
+
+    try:
+        return "image/svg+xml", pio.to_image(fig, format="svg")
+    except (ValueError, RuntimeError):
+        # Largeur suffisante pour ~8 cm imprimés ; le scale=2 historique
+        # quadruplait les pixels pour rien.
+        return "image/png", pio.to_image(fig, format="png", width=400, height=360)
+
+# Palette figée à l'import : évite l'accès attribut Plotly dans la boucle
+# mensuelle de _build_monthly_causes.
+_PALETTE = px.colors.qualitative.Safe
+
+# Mise en page commune des camemberts mensuels, résolue une seule fois.
+_PIE_LAYOUT = dict(
+    margin=dict(l=20, r=20, t=30, b=20),
+    showlegend=True,
+    legend=dict(orientation="h", yanchor="bottom", y=-0.2),
+    height=360,
+)
+
+# En-têtes de tableaux statiques, construits une fois pour tous les sites.
+_SUMMARY_TABLE_HEAD = "    <thead><tr><th>Condition</th><th>Durée</th><th>Temps analysé</th></tr></thead>"
+_EQUIPMENT_TABLE_HEAD = (
+    "    <thead>"
+    "      <tr>"
+    "        <th>Équipement</th>"
+    "        <th>Disponibilité brute (%)</th>"
+    "        <th>Disponibilité avec exclusions (%)</th>"
+    "        <th>Durée totale</th>"
+    "        <th>Temps disponible</th>"
+    "        <th>Temps indisponible</th>"
+    "        <th>Jours avec des données</th>"
+    "      </tr>"
+    "    </thead>"
+)
+_MONTHLY_TABLE_HEAD = "      <thead><tr><th>Cause</th><th>Minutes</th><th>%</th></tr></thead>"
+
+# Au-delà, un tableau est découpé en plusieurs <table> : la mise en page
+# WeasyPrint des longs tableaux est super-linéaire en nombre de lignes.
+_TABLE_CHUNK_ROWS = 40
+
+# Table d'échappement HTML : une seule passe C via str.translate au lieu
+# des cinq replace successifs de html.escape.
+_ESCAPE_TABLE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"}
+)
+
+
+def _escape_text(value: Any) -> str:
+    """Échappe une valeur scalaire pour le HTML (mêmes entités que html.escape)."""
+
+    return str(value).translate(_ESCAPE_TABLE)
+
+
+# Feuille de style et squelette HTML du document, figés à l'import : seuls
+# le titre, la période et les sections varient d'un appel à l'autre.
+_DOCUMENT_CSS = "\n".join(
+    [
+        "    @page { size: A4; margin: 1.5cm; }",
+        "    body { font-family: 'DejaVu Sans', 'Helvetica', Arial, sans-serif; color: #1f2933; font-size: 12px; }",
+        "    h1 { text-transform: uppercase; font-size: 20px; letter-spacing: 1px; margin: 0 0 16px 0; }",
+        "    h2 { font-size: 16px; color: #111827; margin-bottom: 12px; }",
+        "    h3 { font-size: 14px; color: #1f77b4; margin: 18px 0 8px; text-transform: uppercase; letter-spacing: 0.05em; }",
+        "    .meta { display: flex; gap: 16px; margin-bottom: 20px; }",
+        "    .site-block { page-break-after: always; }",
+        "    .site-block:last-of-type { page-break-after: auto; }",
+        "    .cards { display: flex; gap: 12px; margin-bottom: 16px; }",
+        "    .card { background: #f0f2f6; padding: 12px 14px; border-radius: 10px; flex: 1; box-shadow: 0 2px 4px rgba(0,0,0,0.05); }",
+        "    .card-label { font-size: 11px; color: #1f77b4; text-transform: uppercase; letter-spacing: 0.05em; margin-bottom: 6px; }",
+        "    .card-value { font-size: 18px; font-weight: 600; color: #0b1f33; }",
+        "    .card-caption { margin-top: 4px; font-size: 10px; color: #6b7280; }",
+        "    .data-table { width: 100%; border-collapse: collapse; margin-bottom: 16px; }",
+        "    .data-table thead th { background: #1f77b4; color: #ffffff; font-size: 11px; padding: 6px 8px; text-align: left; }",
+        "    .data-table tbody td { border-bottom: 1px solid #d1d5db; padding: 6px 8px; font-size: 11px; }",
+        "    .data-table.compact tbody td { font-size: 10px; }",
+        "    .month-block { display: flex; gap: 16px; margin-bottom: 18px; align-items: flex-start; }",
+        "    .month-label { font-size: 12px; font-weight: 600; color: #0b1f33; margin-bottom: 8px; text-transform: uppercase; letter-spacing: 0.08em; }",
+        "    .month-chart { flex: 1; min-width: 320px; }",
+        "    .month-chart img { width: 100%; border-radius: 8px; border: 1px solid #d1d5db; }",
+        "    .month-chart svg { width: 100%; height: auto; }",
+    ]
+)
+
+_DOCUMENT_HEAD = (
+    "<html>\n"
+    "<head>\n"
+    "  <meta charset='utf-8' />\n"
+    "  <style>\n"
+    f"{_DOCUMENT_CSS}\n"
+    "  </style>\n"
+    "</head>\n"
+    "<body>\n"
+)
+
+_DOCUMENT_FOOT = "\n</body>\n</html>"
+
+
+# Libellés de cartes connus à l'écriture du code : échappés une fois ici,
+# _card_html les insère tels quels.
+_LABEL_AVAILABILITY = _escape_text("Disponibilité estimée")
+_LABEL_DOWNTIME = _escape_text("Indisponibilité réelle")
+_LABEL_ANALYZED = _escape_text("Temps analysé")
+
+
+# Couples singulier/pluriel des unités de durée, indexés par (valeur != 1).
+_JOURS = ("jour", "jours")
+_HEURES = ("heure", "heures")
+_MINUTES = ("minute", "minutes")
+
 
 @dataclass
 class SiteReport:
@@ -37,21 +179,60 @@ class SiteReport:
     raw_blocks: pd.DataFrame
 
 
+@lru_cache(maxsize=4096)
 def _format_minutes(total_minutes: int) -> str:
-    """Copie locale du formateur utilisé dans l'app."""
+    """Copie locale du formateur utilisé dans l'app (mémoïsée : les durées
+    se répètent beaucoup d'un site à l'autre)."""
 
     minutes = int(total_minutes or 0)
     days, remainder = divmod(minutes, 1440)
     hours, mins = divmod(remainder, 60)
 
-    parts: List[str] = []
-    if days:
-        parts.append(f"{days} {'jour' if days == 1 else 'jours'}")
-    if hours:
-        parts.append(f"{hours} {'heure' if hours == 1 else 'heures'}")
-    if mins or not parts:
-        parts.append(f"{mins} {'minute' if mins == 1 else 'minutes'}")
-    return ", ".join(parts)
+    return ", ".join(
+        filter(
+            None,
+            (
+                f"{days} {_JOURS[days != 1]}" if days else "",
+                f"{hours} {_HEURES[hours != 1]}" if hours else "",
+                f"{mins} {_MINUTES[mins != 1]}" if mins or not (days or hours) else "",
+            ),
+        )
+    )
+
+
+def _format_minutes_series(series: pd.Series) -> List[str]:
+    """Version colonne de :func:`_format_minutes` (divmod vectorisé)."""
+
+    minutes = pd.to_numeric(series, errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+    days, remainder = np.divmod(minutes, 1440)
+    hours, mins = np.divmod(remainder, 60)
+
+    formatted: List[str] = []
+    for day, hour, minute in zip(days.tolist(), hours.tolist(), mins.tolist()):
+        parts: List[str] = []
+        if day:
+            parts.append(f"{day} {_JOURS[day != 1]}")
+        if hour:
+            parts.append(f"{hour} {_HEURES[hour != 1]}")
+        if minute or not parts:
+            parts.append(f"{minute} {_MINUTES[minute != 1]}")
+        formatted.append(", ".join(parts))
+    return formatted
+
+
+def _escape_series(series: pd.Series) -> pd.Series:
+    """Équivalent colonne de :func:`html.escape` (mêmes entités)."""
+
+    # map(str) plutôt que astype(str) : les NaN doivent devenir 'nan' comme
+    # avec str(), pas rester manquants.
+    return (
+        series.map(str)
+        .str.replace("&", "&amp;", regex=False)
+        .str.replace("<", "&lt;", regex=False)
+        .str.replace(">", "&gt;", regex=False)
+        .str.replace('"', "&quot;", regex=False)
+        .str.replace("'", "&#x27;", regex=False)
+    )
 
 
 def _ensure_timezone(ts: datetime) -> pd.Timestamp:
@@ -72,17 +253,17 @@ def _prepare_metrics_cards(metrics: MetricDict) -> List[Dict[str, str]]:
 
     cards = [
         {
-            "label": "Disponibilité estimée",
+            "label": _LABEL_AVAILABILITY,
             "value": f"{availability:.2f} %",
             "caption": "",
         },
         {
-            "label": "Indisponibilité réelle",
+            "label": _LABEL_DOWNTIME,
             "value": _format_minutes(downtime_minutes),
             "caption": "",
         },
         {
-            "label": "Temps analysé",
+            "label": _LABEL_ANALYZED,
             "value": _format_minutes(reference_minutes),
             "caption": f"Couverture {_format_number(coverage_pct)} % / {_format_minutes(window_minutes)}",
         },
@@ -100,9 +281,9 @@ def _prepare_summary_rows(summary_df: pd.DataFrame) -> List[Dict[str, str]]:
 
     display = summary_df.copy()
     if "Durée_Minutes" in display.columns:
-        display["Durée"] = display["Durée_Minutes"].apply(lambda m: _format_minutes(int(m)))
+        display["Durée"] = _format_minutes_series(display["Durée_Minutes"])
     if "Temps_Analysé_Minutes" in display.columns:
-        display["Temps analysé"] = display["Temps_Analysé_Minutes"].apply(lambda m: _format_minutes(int(m)))
+        display["Temps analysé"] = _format_minutes_series(display["Temps_Analysé_Minutes"])
 
     columns = [
         col
@@ -112,10 +293,7 @@ def _prepare_summary_rows(summary_df: pd.DataFrame) -> List[Dict[str, str]]:
     if not columns:
         return []
 
-    return [
-        {col: escape(str(row.get(col, ""))) for col in columns}
-        for _, row in display[columns].iterrows()
-    ]
+    return display[columns].apply(_escape_series).to_dict(orient="records")
 
 
 def _prepare_equipment_rows(equipment_df: pd.DataFrame) -> List[Dict[str, str]]:
@@ -132,51 +310,92 @@ def _prepare_equipment_rows(equipment_df: pd.DataFrame) -> List[Dict[str, str]]:
         "Jours avec des données",
     ]
 
-    rows: List[Dict[str, str]] = []
-    for _, row in equipment_df.iterrows():
-        data = {}
-        for col in columns:
-            if col in row.index:
-                data[col] = escape(str(row[col]))
-        rows.append(data)
-    return rows
+    present = [col for col in columns if col in equipment_df.columns]
+    if not present:
+        return []
+
+    return equipment_df[present].apply(_escape_series).to_dict(orient="records")
 
 
-def _build_monthly_causes(raw_blocks: pd.DataFrame, start_dt: datetime, end_dt: datetime) -> List[Dict[str, Any]]:
+def _build_monthly_causes(raw_blocks: pd.DataFrame, tz_start: pd.Timestamp, tz_end: pd.Timestamp) -> List[Dict[str, Any]]:
     if raw_blocks is None or raw_blocks.empty:
         return []
 
-    df = raw_blocks.copy()
-    tz_start = _ensure_timezone(start_dt)
-    tz_end = _ensure_timezone(end_dt)
+    # Coercition unique en datetime64 tz-aware : garantit des comparaisons
+    # et clips vectorisés même si les colonnes arrivent en dtype object.
+    starts = pd.to_datetime(raw_blocks["date_debut"], utc=True).dt.tz_convert("Europe/Paris")
+    ends = pd.to_datetime(raw_blocks["date_fin"], utc=True).dt.tz_convert("Europe/Paris")
 
-    df["clip_start"] = df["date_debut"].clip(lower=tz_start)
-    df["clip_end"] = df["date_fin"].clip(upper=tz_end)
-    df = df.loc[df["clip_start"].notna() & df["clip_end"].notna()].copy()
-    if df.empty:
+    # Filtrage sur la fenêtre avant copie : on ne matérialise que les blocs
+    # qui chevauchent réellement la période demandée. Les dates NaT tombent
+    # d'elles-mêmes (comparaison False).
+    mask = (ends > tz_start) & (starts < tz_end)
+    if not mask.any():
         return []
 
-    df["duration"] = (
-        (df["clip_end"] - df["clip_start"]).dt.total_seconds() / 60
-    ).clip(lower=0).fillna(0)
+    clip_start = starts[mask].clip(lower=tz_start)
+    clip_end = ends[mask].clip(upper=tz_end)
+
+    # Soustraction entière sur les nanosecondes époque : pas de pipeline
+    # datetime ni de Série intermédiaire.
+    start_ns = clip_start.to_numpy(dtype="datetime64[ns]").view("i8")
+    end_ns = clip_end.to_numpy(dtype="datetime64[ns]").view("i8")
+    duration = np.maximum(end_ns - start_ns, 0) / 60_000_000_000
 
-    df = df.loc[df["duration"] > 0].copy()
+    # Plancher au mois par cast datetime64[M] : une passe NumPy, sans
+    # matérialiser de Period (et sans l'avertissement de perte de fuseau).
+    wall_starts = clip_start.dt.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+    month_starts = wall_starts.astype("datetime64[M]").astype("datetime64[ns]")
+
+    # Un seul constructeur pour le cadre de travail : aucune colonne
+    # d'origine n'est recopiée puis réécrite.
+    df = pd.DataFrame(
+        {
+            "month": month_starts,
+            # Clés de groupe en codes entiers plutôt qu'en chaînes Python.
+            "cause": pd.Categorical(raw_blocks.loc[mask, "cause"].fillna("Non spécifié")),
+            "duration": duration,
+            # int8 suffit pour l'état ; les NULL SQL (NaN) sont rabattus sur
+            # le sentinel -1 déjà utilisé en amont, qui reste != 0.
+            "est_disponible": raw_blocks.loc[mask, "est_disponible"].fillna(-1).to_numpy(dtype=np.int8),
+        }
+    )
+
+    df = df.loc[df["duration"] > 0]
     if df.empty:
         return []
 
-    df["month"] = df["clip_start"].dt.to_period("M").dt.to_timestamp()
-    df["cause"] = df["cause"].fillna("Non spécifié")
+    # Une seule agrégation vectorisée mois × cause au lieu d'un groupby
+    # imbriqué par mois.
+    # Comparaison directement sur le tableau NumPy : pas de Série booléenne
+    # intermédiaire ni d'alignement d'index.
+    unavail = df.iloc[df["est_disponible"].to_numpy() == 0]
+    agg_all = (
+        unavail.groupby(["month", "cause"], sort=False, observed=True)["duration"]
+        .sum()
+        .reset_index()
+    )
+    totals = agg_all.groupby("month")["duration"].transform("sum")
+    agg_all["minutes"] = agg_all["duration"].round(0).astype(int)
+    agg_all["percentage"] = np.where(totals > 0, agg_all["duration"] / totals * 100, 0.0)
+
+    grouped = {
+        month: group.sort_values("duration", ascending=False)
+        for month, group in agg_all.groupby("month", sort=False)
+    }
 
     monthly_records: List[Dict[str, Any]] = []
-    palette = px.colors.qualitative.Safe
+    pending_figures: List[Any] = []
 
-    for month, group in df.groupby("month"):
-        unavail = group.loc[group["est_disponible"] == 0]
-        if unavail.empty:
+    for month in sorted(df["month"].unique()):
+        agg = grouped.get(month)
+        if agg is None:
             monthly_records.append(
                 {
                     "label": month.strftime("%Y-%m"),
                     "image": None,
+                    "svg": None,
+                    "image_mime": "image/png",
                     "rows": [
                         {
                             "cause": "Aucune indisponibilité",
@@ -188,116 +407,118 @@ def _build_monthly_causes(raw_blocks: pd.DataFrame, start_dt: datetime, end_dt:
             )
             continue
 
-        agg = (
-            unavail.groupby("cause")["duration"].sum().reset_index().sort_values("duration", ascending=False)
-        )
-        total = float(agg["duration"].sum())
-        agg["minutes"] = agg["duration"].round(0).astype(int)
-        agg["percentage"] = agg["duration"].apply(lambda val: _format_number((val / total * 100) if total else 0))
-
-        fig = px.pie(
-            agg,
-            names="cause",
-            values="duration",
-            color="cause",
-            color_discrete_map={c: palette[i % len(palette)] for i, c in enumerate(agg["cause"])},
-            hole=0.45,
-        )
-        fig.update_layout(
-            margin=dict(l=20, r=20, t=30, b=20),
-            showlegend=True,
-            legend=dict(orientation="h", yanchor="bottom", y=-0.2),
-            height=360,
+        fig = go.Figure(
+            data=[
+                go.Pie(
+                    labels=agg["cause"].tolist(),
+                    values=agg["duration"].tolist(),
+                    hole=0.45,
+                    marker=dict(colors=list(islice(cycle(_PALETTE), len(agg)))),
+                )
+            ],
+            layout=_PIE_LAYOUT,
         )
 
-        try:
-            image_bytes = pio.to_image(fig, format="png", scale=2)
-        except ValueError as exc:
-            raise ImportError(
-                "La génération d'images Plotly nécessite le package 'kaleido'. Installez-le avec 'pip install -U kaleido'."
-            ) from exc
-
-        encoded = base64.b64encode(image_bytes).decode("utf-8")
         rows = [
             {
-                "cause": escape(str(row.cause)),
-                "minutes": escape(str(int(row.minutes))),
-                "percentage": escape(f"{row.percentage.replace('.', ',')} %"),
+                "cause": _escape_text(row.cause),
+                "minutes": _escape_text(int(row.minutes)),
+                "percentage": _escape_text(f"{_format_number(row.percentage)} %"),
             }
             for row in agg.itertuples()
         ]
 
+        pending_figures.append((len(monthly_records), fig))
         monthly_records.append(
             {
                 "label": month.strftime("%Y-%m"),
-                "image": encoded,
+                "image": None,
+                "svg": None,
+                "image_mime": "image/png",
                 "rows": rows,
             }
         )
 
-    monthly_records.sort(key=lambda item: item["label"])
+    # Kaleido est un rendu hors-process : les appels se parallélisent bien
+    # car le GIL est relâché pendant les entrées/sorties du sous-processus.
+    if pending_figures:
+        try:
+            with ThreadPoolExecutor(max_workers=min(8, len(pending_figures))) as pool:
+                images = list(
+                    pool.map(_render_chart, [fig for _, fig in pending_figures])
+                )
+        except (ValueError, RuntimeError) as exc:
+            raise ImportError(
+                "La génération d'images Plotly nécessite le package 'kaleido'. Installez-le avec 'pip install -U kaleido'."
+            ) from exc
+
+        for (index, _), (mime, image_bytes) in zip(pending_figures, images):
+            if mime == "image/svg+xml":
+                # SVG inséré tel quel dans le HTML : ni base64 (+33 % de
+                # charge), ni décodage d'image côté WeasyPrint.
+                monthly_records[index]["svg"] = image_bytes.decode("utf-8")
+            else:
+                monthly_records[index]["image"] = base64.b64encode(image_bytes).decode("utf-8")
+            monthly_records[index]["image_mime"] = mime
+
     return monthly_records
 
 
-def _render_site_block(report: SiteReport, start_dt: datetime, end_dt: datetime) -> str:
+def _card_html(card: Dict[str, str]) -> str:
+    """Fragment HTML d'une carte métrique, construit en un seul passage.
+
+    Le libellé est déjà échappé (constantes module) ; seules la valeur et la
+    légende, dynamiques, passent par :func:`_escape_text`.
+    """
+
+    caption_html = f"<div class='card-caption'>{_escape_text(card['caption'])}</div>" if card["caption"] else ""
+    return (
+        "    <div class='card'>"
+        f"      <div class='card-label'>{card['label']}</div>"
+        f"      <div class='card-value'>{_escape_text(card['value'])}</div>"
+        f"      {caption_html}"
+        "    </div>"
+    )
+
+
+def _render_site_block(report: SiteReport, tz_start: pd.Timestamp, tz_end: pd.Timestamp) -> str:
     cards = _prepare_metrics_cards(report.metrics)
     summary_rows = _prepare_summary_rows(report.summary_df)
     equipment_rows = _prepare_equipment_rows(report.equipment_summary)
-    monthly = _build_monthly_causes(report.raw_blocks, start_dt, end_dt)
+    monthly = _build_monthly_causes(report.raw_blocks, tz_start, tz_end)
 
     parts = [
         "<section class='site-block'>",
-        f"  <h2>{escape(report.site_label)} ({escape(report.site)})</h2>",
+        f"  <h2>{_escape_text(report.site_label)} ({_escape_text(report.site)})</h2>",
         "  <div class='cards'>",
     ]
 
-    for card in cards:
-        caption_html = f"<div class='card-caption'>{escape(card['caption'])}</div>" if card["caption"] else ""
-        parts.append(
-            "    <div class='card'>"
-            f"      <div class='card-label'>{escape(card['label'])}</div>"
-            f"      <div class='card-value'>{escape(card['value'])}</div>"
-            f"      {caption_html}"
-            "    </div>"
-        )
-
+    parts.extend(_card_html(card) for card in cards)
     parts.append("  </div>")
 
     if summary_rows:
         parts.append("  <h3>Conditions critiques</h3>")
         parts.append("  <table class='data-table'>")
-        parts.append("    <thead><tr><th>Condition</th><th>Durée</th><th>Temps analysé</th></tr></thead>")
+        parts.append(_SUMMARY_TABLE_HEAD)
         parts.append("    <tbody>")
-        for row in summary_rows:
-            parts.append(
-                "      <tr>"
-                f"        <td>{row.get('Condition', '')}</td>"
-                f"        <td>{row.get('Durée', '')}</td>"
-                f"        <td>{row.get('Temps analysé', '')}</td>"
-                "      </tr>"
-            )
+        parts.extend(
+            "      <tr>"
+            f"        <td>{row.get('Condition', '')}</td>"
+            f"        <td>{row.get('Durée', '')}</td>"
+            f"        <td>{row.get('Temps analysé', '')}</td>"
+            "      </tr>"
+            for row in summary_rows
+        )
         parts.append("    </tbody>")
         parts.append("  </table>")
 
     if equipment_rows:
         parts.append("  <h3>Indicateurs clés par équipement</h3>")
-        parts.append("  <table class='data-table'>")
-        parts.append(
-            "    <thead>"
-            "      <tr>"
-            "        <th>Équipement</th>"
-            "        <th>Disponibilité brute (%)</th>"
-            "        <th>Disponibilité avec exclusions (%)</th>"
-            "        <th>Durée totale</th>"
-            "        <th>Temps disponible</th>"
-            "        <th>Temps indisponible</th>"
-            "        <th>Jours avec des données</th>"
-            "      </tr>"
-            "    </thead>"
-        )
-        parts.append("    <tbody>")
-        for row in equipment_rows:
-            parts.append(
+        for offset in range(0, len(equipment_rows), _TABLE_CHUNK_ROWS):
+            parts.append("  <table class='data-table'>")
+            parts.append(_EQUIPMENT_TABLE_HEAD)
+            parts.append("    <tbody>")
+            parts.extend(
                 "      <tr>"
                 f"        <td>{row.get('Équipement', '')}</td>"
                 f"        <td>{row.get('Disponibilité Brute (%)', '')}</td>"
@@ -307,32 +528,39 @@ def _render_site_block(report: SiteReport, start_dt: datetime, end_dt: datetime)
                 f"        <td>{row.get('Temps Indisponible', '')}</td>"
                 f"        <td>{row.get('Jours avec des données', '')}</td>"
                 "      </tr>"
+                for row in equipment_rows[offset:offset + _TABLE_CHUNK_ROWS]
             )
-        parts.append("    </tbody>")
-        parts.append("  </table>")
+            parts.append("    </tbody>")
+            parts.append("  </table>")
 
     if monthly:
         parts.append("  <h3>Causes d'indisponibilité par mois</h3>")
         for record in monthly:
             parts.append("  <div class='month-block'>")
-            parts.append(f"    <div class='month-label'>{escape(record['label'])}</div>")
-            if record["image"]:
+            parts.append(f"    <div class='month-label'>{_escape_text(record['label'])}</div>")
+            if record["svg"]:
                 parts.append(
                     "    <div class='month-chart'>"
-                    f"      <img src='data:image/png;base64,{record['image']}' alt='Pie {escape(record['label'])}' />"
+                    f"      {record['svg']}"
                     "    </div>"
                 )
-            parts.append("    <table class='data-table compact'>")
-            parts.append("      <thead><tr><th>Cause</th><th>Minutes</th><th>%</th></tr></thead>")
-            parts.append("      <tbody>")
-            for row in record["rows"]:
+            elif record["image"]:
                 parts.append(
-                    "        <tr>"
-                    f"          <td>{row['cause']}</td>"
-                    f"          <td>{row['minutes']}</td>"
-                    f"          <td>{row['percentage']}</td>"
-                    "        </tr>"
+                    "    <div class='month-chart'>"
+                    f"      <img src='data:{record['image_mime']};base64,{record['image']}' alt='Pie {_escape_text(record['label'])}' />"
+                    "    </div>"
                 )
+            parts.append("    <table class='data-table compact'>")
+            parts.append(_MONTHLY_TABLE_HEAD)
+            parts.append("      <tbody>")
+            parts.extend(
+                "        <tr>"
+                f"          <td>{row['cause']}</td>"
+                f"          <td>{row['minutes']}</td>"
+                f"          <td>{row['percentage']}</td>"
+                "        </tr>"
+                for row in record["rows"]
+            )
             parts.append("      </tbody>")
             parts.append("    </table>")
             parts.append("  </div>")
@@ -353,53 +581,41 @@ def generate_statistics_pdf(
     if not reports_list:
         raise ValueError("Aucun site à exporter")
 
-    start_label = _ensure_timezone(start_dt).strftime("%d/%m/%Y")
-    end_label = _ensure_timezone(end_dt).strftime("%d/%m/%Y")
-
-    sections = [
-        _render_site_block(report, start_dt, end_dt)
-        for report in reports_list
-    ]
-
-    html = "\n".join(
-        [
-            "<html>",
-            "<head>",
-            "  <meta charset='utf-8' />",
-            "  <style>",
-            "    @page { size: A4; margin: 1.5cm; }",
-            "    body { font-family: 'DejaVu Sans', 'Helvetica', Arial, sans-serif; color: #1f2933; font-size: 12px; }",
-            "    h1 { text-transform: uppercase; font-size: 20px; letter-spacing: 1px; margin: 0 0 16px 0; }",
-            "    h2 { font-size: 16px; color: #111827; margin-bottom: 12px; }",
-            "    h3 { font-size: 14px; color: #1f77b4; margin: 18px 0 8px; text-transform: uppercase; letter-spacing: 0.05em; }",
-            "    .meta { display: flex; gap: 16px; margin-bottom: 20px; }",
-            "    .site-block { page-break-after: always; }",
-            "    .site-block:last-of-type { page-break-after: auto; }",
-            "    .cards { display: flex; gap: 12px; margin-bottom: 16px; }",
-            "    .card { background: #f0f2f6; padding: 12px 14px; border-radius: 10px; flex: 1; box-shadow: 0 2px 4px rgba(0,0,0,0.05); }",
-            "    .card-label { font-size: 11px; color: #1f77b4; text-transform: uppercase; letter-spacing: 0.05em; margin-bottom: 6px; }",
-            "    .card-value { font-size: 18px; font-weight: 600; color: #0b1f33; }",
-            "    .card-caption { margin-top: 4px; font-size: 10px; color: #6b7280; }",
-            "    .data-table { width: 100%; border-collapse: collapse; margin-bottom: 16px; }",
-            "    .data-table thead th { background: #1f77b4; color: #ffffff; font-size: 11px; padding: 6px 8px; text-align: left; }",
-            "    .data-table tbody td { border-bottom: 1px solid #d1d5db; padding: 6px 8px; font-size: 11px; }",
-            "    .data-table.compact tbody td { font-size: 10px; }",
-            "    .month-block { display: flex; gap: 16px; margin-bottom: 18px; align-items: flex-start; }",
-            "    .month-label { font-size: 12px; font-weight: 600; color: #0b1f33; margin-bottom: 8px; text-transform: uppercase; letter-spacing: 0.08em; }",
-            "    .month-chart { flex: 1; min-width: 320px; }",
-            "    .month-chart img { width: 100%; border-radius: 8px; border: 1px solid #d1d5db; }",
-          "  </style>",
-            "</head>",
-            "<body>",
-            f"  <h1>{escape(title)}</h1>",
-            f"  <div class='meta'><div>Période : {escape(start_label)} → {escape(end_label)}</div></div>",
-            *sections,
-            "</body>",
-            "</html>",
-        ]
+    # Localisation unique : les bornes sont converties une fois puis passées
+    # telles quelles à chaque bloc de site.
+    tz_start = _ensure_timezone(start_dt)
+    tz_end = _ensure_timezone(end_dt)
+    start_label = tz_start.strftime("%d/%m/%Y")
+    end_label = tz_end.strftime("%d/%m/%Y")
+
+    # Les sites sont indépendants : le gros du coût par site (rendu Kaleido,
+    # agrégations pandas) relâche le GIL, donc un pool de threads suffit.
+    # pool.map préserve l'ordre des sections.
+    _warm_kaleido()
+
+    if len(reports_list) > 1:
+        with ThreadPoolExecutor(max_workers=min(4, len(reports_list))) as pool:
+            sections = list(
+                pool.map(
+                    lambda report: _render_site_block(report, tz_start, tz_end),
+                    reports_list,
+                )
+            )
+    else:
+        sections = [_render_site_block(reports_list[0], tz_start, tz_end)]
+
+    html = (
+        _DOCUMENT_HEAD
+        + f"  <h1>{_escape_text(title)}</h1>\n"
+        + f"  <div class='meta'><div>Période : {_escape_text(start_label)} → {_escape_text(end_label)}</div></div>\n"
+        + "\n".join(sections)
+        + _DOCUMENT_FOOT
     )
 
-    pdf_io = BytesIO()
-    HTML(string=html).write_pdf(target=pdf_io, stylesheets=[CSS(string="")])
-    return pdf_io.getvalue()
+    # Sans cible, write_pdf renvoie directement les octets : pas de tampon
+    # intermédiaire à recopier. Le document part déjà encodé en UTF-8 pour
+    # épargner à WeasyPrint une passe d'encodage sur une chaîne volumineuse.
+    return HTML(string=html.encode("utf-8"), encoding="utf-8").write_pdf(
+        stylesheets=[_EMPTY_CSS]
+    )
 